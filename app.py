@@ -2,214 +2,492 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
-from collections import defaultdict
 import math
 import os
+from dataclasses import dataclass
+from typing import NamedTuple
 
 # -----------------------------
 # Page Config
 # -----------------------------
 st.set_page_config(page_title="Task Auto-Assignment System", page_icon="📋", layout="wide")
 
+SKILL_COLUMNS = ["Bending", "Gluing", "Assembling", "EdgeScrap", "OpenPaper", "QualityControl"]
+SCORE_SCALE = 1_000_000  # fixed-point scale of skill match scores
+TERM_SCALE = SCORE_SCALE * 1000  # finer scale of the per-skill ratios, rounded once into SCORE_SCALE
+
 # -----------------------------
 # Data Models
 # -----------------------------
+def column_positions(df):
+    # Index of every column, and of the skill columns, in df.itertuples(index=False, name=None) rows
+    positions = {column: i for i, column in enumerate(df.columns)}
+    return positions, [positions[skill] for skill in SKILL_COLUMNS]
+
 class TaskSimulationData:
-    def __init__(self, row):
-        self.product = row["Product"]
-        self.description = row["Task"]
-        self.task_id = row["Result"]
-        # Parse requirements
-        requirements_str = str(row["Requirements"])
-        if pd.isna(row["Requirements"]) or requirements_str.lower() == "nan":
-            self.requirements = []
+    def __init__(self, row, positions, skill_positions):
+        self.product = row[positions["Product"]]
+        self.description = row[positions["Task"]]
+        self.task_id = row[positions["Result"]]
+        # Parsed once per products table by _parse_products
+        self.requirements = row[positions["_requirements"]]
+        # Skills, as percentages in SKILL_COLUMNS order
+        self.skill_requirements = np.array([row[i] for i in skill_positions], dtype=np.float64)
+        if "TimePerPieceSeconds" in positions:
+            self.time_per_piece_seconds = int(row[positions["TimePerPieceSeconds"]])
         else:
-            self.requirements = [r.strip() for r in requirements_str.split(",") if r.strip()]
-        # Skills
-        self.skill_requirements = {
-            "Bending": row["Bending"] / 100,
-            "Gluing": row["Gluing"] / 100,
-            "Assembling": row["Assembling"] / 100,
-            "EdgeScrap": row["EdgeScrap"] / 100,
-            "OpenPaper": row["OpenPaper"] / 100,
-            "QualityControl": row["QualityControl"] / 100,
-        }
-        self.time_per_piece_seconds = int(row.get("TimePerPieceSeconds", 60))
+            self.time_per_piece_seconds = 60
 
 class WorkerSimulationData:
-    def __init__(self, row):
-        self.name = row["Worker"]
-        self.skills = {
-            "Bending": row["Bending"],
-            "Gluing": row["Gluing"],
-            "Assembling": row["Assembling"],
-            "EdgeScrap": row["EdgeScrap"],
-            "OpenPaper": row["OpenPaper"],
-            "QualityControl": row["QualityControl"],
-        }
+    def __init__(self, row, positions, skill_positions):
+        self.name = row[positions["Worker"]]
+        # Skills, as fractions of 1 in SKILL_COLUMNS order
+        self.skills = np.array([row[i] for i in skill_positions], dtype=np.float64)
+
+class SimContext(NamedTuple):
+    # Everything a simulation needs that doesn't depend on the order itself
+    task_sim_data_map: dict
+    worker_sim_data_map: dict
+    skill_score_matrix: np.ndarray  # (workers, tasks) int64, in map order
+    requirement_index: np.ndarray  # (tasks, max requirements) of inventory cells, -1 padded
+    cell_index: dict  # task id -> inventory cell
+    product_tasks: dict  # product -> its task ids, sorted by Result
+
+@dataclass
+class TaskArrays:
+    # The task instances of one order, as parallel arrays indexed by instance
+    task_rows: np.ndarray  # row in the SimContext matrices, which is also the inventory cell
+    remaining_qty: np.ndarray
+    time_per_piece: np.ndarray
+
+    @classmethod
+    def from_order(cls, products_to_produce, ctx):
+        task_ids, quantities = [], []
+        for product, qty in products_to_produce.items():
+            for task_id in ctx.product_tasks.get(product, []):
+                task_ids.append(task_id)
+                quantities.append(qty)
+        return cls(
+            task_rows=np.array([ctx.cell_index[task_id] for task_id in task_ids], dtype=np.int64),
+            remaining_qty=np.array(quantities, dtype=np.int32),
+            time_per_piece=np.array(
+                [ctx.task_sim_data_map[task_id].time_per_piece_seconds for task_id in task_ids], dtype=np.int32
+            ),
+        )
 
 # -----------------------------
 # Load & Save Data
 # -----------------------------
+def parquet_mirror_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def read_table(csv_path):
+    # The CSV is the editable source of truth; the parquet file next to it is a faster
+    # loading copy, used only while it's at least as new as the CSV. Any trouble with the
+    # copy (no parquet engine, a corrupt or unreadable file) falls back to the CSV, which
+    # also rewrites the copy.
+    parquet_path = parquet_mirror_path(csv_path)
+    try:
+        if os.path.isfile(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            return pd.read_parquet(parquet_path)
+    except Exception:
+        pass
+    df = pd.read_csv(csv_path)
+    write_parquet_mirror(df, csv_path)
+    return df
+
+def write_parquet_mirror(df, csv_path):
+    try:
+        df.to_parquet(parquet_mirror_path(csv_path), index=False)
+    except Exception:  # e.g. no parquet engine or a read-only directory; the CSV alone is enough
+        pass
+
+def write_table(df, csv_path):
+    df.to_csv(csv_path, index=False)
+    write_parquet_mirror(df, csv_path)
+
 @st.cache_data
 def load_data():
     if os.path.exists("workers.csv"):
-        workers_df = pd.read_csv("workers.csv")
+        workers_df = read_table("workers.csv")
     else:
         workers_df = pd.DataFrame(columns=[
             "Worker","Bending","Gluing","Assembling","EdgeScrap","OpenPaper","QualityControl",
             "FavoriteProduct1","FavoriteProduct2","FavoriteProduct3"
         ])
-        workers_df.to_csv("workers.csv", index=False)
+        write_table(workers_df, "workers.csv")
 
     if os.path.exists("products.csv"):
-        products_df = pd.read_csv("products.csv")
+        products_df = read_table("products.csv")
     else:
         products_df = pd.DataFrame(columns=[
             "Product","Task","Result","Requirements","Bending","Gluing","Assembling",
             "EdgeScrap","OpenPaper","QualityControl","TimePerPieceSeconds"
         ])
-        products_df.to_csv("products.csv", index=False)
+        write_table(products_df, "products.csv")
 
     return workers_df, products_df
 
 def save_workers_data(df):
-    df.to_csv("workers.csv", index=False)
-    st.cache_data.clear()
+    write_table(df, "workers.csv")
+    load_data.clear()
 
 def save_products_data(df):
-    df.to_csv("products.csv", index=False)
-    st.cache_data.clear()
+    write_table(df, "products.csv")
+    load_data.clear()
 
 # -----------------------------
 # Helper Functions
 # -----------------------------
 def calculate_skill_match(worker_skills, task_skill_requirements):
-    total_score, count = 0, 0
-    for skill, req_ratio in task_skill_requirements.items():
-        if req_ratio > 0:
-            total_score += worker_skills.get(skill, 0) / max(0.01, req_ratio)
-            count += 1
-    return total_score / count if count > 0 else 0.1
+    # worker_skills is (workers, skills) and task_skill_requirements is (tasks, skills), both
+    # int16 percentages; returns the (workers, tasks) matrix of average skill/requirement
+    # ratios as int64 fixed point scaled by SCORE_SCALE. Each ratio is truncated at
+    # TERM_SCALE and the average rounded once, so averages that are exactly equal, like
+    # 4.25 from different skill mixes, get equal scores and fall to the quantity tie-break.
+    mask = task_skill_requirements > 0
+    ratios = (worker_skills.astype(np.int64)[:, None, :] * TERM_SCALE) // np.maximum(
+        task_skill_requirements.astype(np.int64)[None, :, :], 1
+    )
+    counts = mask.sum(axis=1)
+    divisor = np.maximum(counts, 1) * (TERM_SCALE // SCORE_SCALE)
+    scores = ((ratios * mask).sum(axis=-1) + divisor // 2) // divisor
+    return np.where(counts > 0, scores, SCORE_SCALE // 10).astype(np.int64)
+
+def to_percentages(values):
+    # Rounds to whole percentages as int16, clipped so out-of-range values can't wrap around
+    limits = np.iinfo(np.int16)
+    return np.clip(np.rint(values), limits.min, limits.max).astype(np.int16)
 
 def format_time(minutes):
     hour = 8 + (minutes // 60)
     minute = minutes % 60
     return f"{hour:02d}:{minute:02d}"
 
-def check_requirements_met(task, inventory, required_qty):
-    if not task["requirements"]:
-        return True
-    for req in task["requirements"]:
-        # Strict rule: prerequisite must be fully complete for the entire product qty
-        if inventory[req] < required_qty:
-            return False
-    return True
+def build_time_labels(max_minutes, slot_duration_minutes):
+    # format_time of every slot start up to max_minutes, indexed by slot number
+    return [format_time(minutes) for minutes in range(0, max_minutes + 1, slot_duration_minutes)]
+
+def count_unmet_requirements(inventory, required_qty, req_matrix):
+    # req_matrix is (tasks, max requirements) of inventory cells padded with -1, which
+    # lands on the sentinel last cell of inventory that satisfies every check.
+    # Strict rule: prerequisite must be fully complete for the entire product qty
+    held = inventory[req_matrix.ravel()].reshape(req_matrix.shape)
+    return (held < required_qty.reshape(-1, 1)).sum(axis=1)
+
+def build_unblock_index(req_matrix, n_cells):
+    # Reverse of req_matrix in CSR form: for each inventory cell, the tasks waiting on it
+    cells = req_matrix.ravel()
+    tasks = np.repeat(np.arange(req_matrix.shape[0]), req_matrix.shape[1])
+    keep = cells >= 0
+    cells, tasks = cells[keep], tasks[keep]
+    unblock_indptr = np.zeros(n_cells + 2, np.int64)
+    np.cumsum(np.bincount(cells, minlength=n_cells + 1), out=unblock_indptr[1:])
+    return unblock_indptr, tasks[np.argsort(cells, kind="stable")]
+
+def add_to_inventory(cell, pieces, inventory, pending_reqs, required_qty, unblock_indptr, unblock_idx):
+    # Counts the requirement off for every task whose threshold this addition reaches
+    before = inventory[cell]
+    inventory[cell] += pieces
+    for k in range(unblock_indptr[cell], unblock_indptr[cell + 1]):
+        t = unblock_idx[k]
+        if before < required_qty[t] <= inventory[cell]:
+            pending_reqs[t] -= 1
 
 # -----------------------------
 # Simulation Logic
 # -----------------------------
-def assign_tasks(products_to_produce, available_workers_df, products_df, slot_duration_minutes=30):
-    try:
-        slot_duration_seconds = slot_duration_minutes * 60
-        workday_minutes = 8 * 60
-        task_sim_data_map = {row["Result"]: TaskSimulationData(row) for _, row in products_df.iterrows()}
-        worker_sim_data_map = {row["Worker"]: WorkerSimulationData(row) for _, row in available_workers_df.iterrows()}
-
-        # Expand tasks
-        all_task_instances = []
-        for product, qty in products_to_produce.items():
-            tasks = products_df[products_df["Product"] == product].sort_values(by="Result")
-            for _, row in tasks.iterrows():
-                sim = task_sim_data_map[row["Result"]]
-                all_task_instances.append({
-                    "task_id": sim.task_id,
-                    "description": sim.description,
-                    "product": sim.product,
-                    "requirements": sim.requirements,
-                    "skill_requirements": sim.skill_requirements,
-                    "time_per_piece": sim.time_per_piece_seconds,
-                    "remaining_qty": qty
-                })
-
-        total_seconds = sum(t["time_per_piece"] * t["remaining_qty"] for t in all_task_instances)
-        total_worker_seconds_per_day = len(available_workers_df) * workday_minutes * 60
-        estimated_days = max(1, math.ceil(total_seconds / total_worker_seconds_per_day))
-
-        current_time_minutes = 0
-        current_day = 1
-        inventory = defaultdict(int)
-        schedule = defaultdict(lambda: defaultdict(lambda: defaultdict(str)))
-        simulation_log = []
-
-        while True:
-            if all(t["remaining_qty"] <= 0 for t in all_task_instances):
-                break
-
-            current_day = (current_time_minutes // workday_minutes) + 1
-            current_slot = (current_time_minutes % workday_minutes) // slot_duration_minutes
-
-            available_tasks = []
-            for t in all_task_instances:
-                if t["remaining_qty"] > 0:
-                    product_qty = products_to_produce[t["product"]]
-                    if check_requirements_met(t, inventory, product_qty):
-                        available_tasks.append(t)
-
-            if not available_tasks:
-                current_time_minutes += slot_duration_minutes
-                continue
-
-            worker_assignments = {}
-            for worker in worker_sim_data_map.values():
-                if not available_tasks:
-                    break
-                best_task = max(
-                    available_tasks,
-                    key=lambda task: (calculate_skill_match(worker.skills, task["skill_requirements"]), task["remaining_qty"])
-                )
-                worker_assignments[worker.name] = best_task
-
-            for worker_name, task in worker_assignments.items():
+def _steady_slots(worker_assignments, demand, inflow, available_idx, ready, remaining_qty, required_qty,
+                  inventory, req_matrix, skill_scores, max_slots):
+    # Number of slots, starting with this one, for which the current assignment repeats
+    # unchanged, with each task losing demand and each inventory cell gaining inflow
+    # pieces per slot; 0 if a task runs out this slot.
+    slots = max_slots
+    # No assigned task may run out, or its workers would switch tasks mid-slot
+    for t in worker_assignments:
+        if demand[t] > 0:
+            slots = min(slots, (remaining_qty[t] - 1) // demand[t])
+    if slots == 0:
+        return 0
+
+    # No worker's tie-break on remaining qty may flip
+    for w in range(worker_assignments.shape[0]):
+        best = worker_assignments[w]
+        scores = skill_scores[w, available_idx]
+        for c in available_idx[scores == scores.max()]:
+            if c != best and demand[best] > demand[c]:
+                gap = remaining_qty[best] - remaining_qty[c]
+                if c < best:
+                    gap -= 1
+                slots = min(slots, gap // (demand[best] - demand[c]) + 1)
+
+    # No blocked task may become available
+    for t in range(remaining_qty.shape[0]):
+        if remaining_qty[t] > 0 and not ready[t]:
+            unlock = 0
+            for c in req_matrix[t]:
+                short = required_qty[t] - inventory[c]
+                if short > 0:
+                    if inflow[c] == 0:
+                        unlock = max_slots
+                        break
+                    unlock = max(unlock, (short + inflow[c] - 1) // inflow[c])
+            slots = min(slots, unlock)
+    return slots
+
+def _simulate(remaining_qty, time_per_piece, task_cell, skill_scores, req_matrix, unblock_indptr, unblock_idx,
+              n_cells, slot_duration_minutes, workday_minutes, max_minutes):
+    # Runs the slot loop on plain arrays. Tasks and workers are referred to by index,
+    # inventory by cell (one per task id); the caller turns the returned events into
+    # the schedule and log.
+    n_tasks = remaining_qty.shape[0]
+    n_workers = skill_scores.shape[0]
+    qty_scale = np.int64(remaining_qty.max() if remaining_qty.size > 0 else 0) + 1
+    slot_duration_seconds = slot_duration_minutes * 60
+    required_qty = remaining_qty.copy()
+    inventory = np.zeros(n_cells + 1, np.int32)
+    inventory[n_cells] = np.iinfo(np.int32).max
+    # A task is ready once all its requirements are met; production counts them down
+    pending_reqs = count_unmet_requirements(inventory, required_qty, req_matrix)
+
+    # Every processed slot gets one schedule cell per worker. A log entry either ends a
+    # worker's slot or uses up a task, which bounds the log's size.
+    max_slots = max_minutes // slot_duration_minutes + 1
+    slot_time = np.empty(max_slots, np.int32)
+    cell_dominant = np.empty((max_slots, n_workers), np.int32)
+    cell_task = np.empty((max_slots, n_workers), np.int32)
+    cell_pieces = np.empty((max_slots, n_workers), np.int32)
+    log_size = max_slots * n_workers + n_tasks
+    log_time = np.empty(log_size, np.int32)
+    log_worker = np.empty(log_size, np.int32)
+    log_task = np.empty(log_size, np.int32)
+    log_pieces = np.empty(log_size, np.int32)
+    n_slots = 0
+    n_log = 0
+
+    current_time_minutes = 0
+    current_day = 1
+    while True:
+        if not (remaining_qty > 0).any():
+            break
+
+        current_day = (current_time_minutes // workday_minutes) + 1
+
+        ready = pending_reqs == 0
+        available_idx = np.flatnonzero((remaining_qty > 0) & ready)
+
+        if available_idx.size == 0:
+            # Nothing can be produced, so no requirement will ever be met
+            break
+
+        # Best skill match wins; ties go to the task with the most pieces left. Both fold into
+        # one integer key, so a single argmax assigns every worker
+        keys = skill_scores[:, available_idx].astype(np.int64) * qty_scale + remaining_qty[available_idx]
+        worker_assignments = available_idx[np.argmax(keys, axis=1)]
+
+        # Until a task runs out or unblocks another, every slot plays out the same way,
+        # so jump over all of them at once
+        slot_pieces = slot_duration_seconds // time_per_piece[worker_assignments]
+        demand = np.bincount(worker_assignments, weights=slot_pieces, minlength=n_tasks).astype(np.int64)
+        inflow = np.bincount(
+            task_cell[worker_assignments], weights=slot_pieces, minlength=n_cells + 1
+        ).astype(np.int64)
+        slots = _steady_slots(
+            worker_assignments, demand, inflow, available_idx, ready, remaining_qty, required_qty, inventory,
+            req_matrix, skill_scores, max_slots - n_slots,
+        )
+
+        if slots > 0:
+            block = slice(n_slots, n_slots + slots)
+            slot_time[block] = current_time_minutes + np.arange(slots) * slot_duration_minutes
+            cell_dominant[block] = worker_assignments
+            cell_task[block] = worker_assignments
+            cell_pieces[block] = slot_pieces
+
+            producing = np.flatnonzero(slot_pieces > 0)
+            for j in range(slots):
+                entries = slice(n_log, n_log + producing.size)
+                log_time[entries] = slot_time[n_slots + j]
+                log_worker[entries] = producing
+                log_task[entries] = worker_assignments[producing]
+                log_pieces[entries] = slot_pieces[producing]
+                n_log += producing.size
+
+            remaining_qty -= slots * demand
+            for c in np.flatnonzero(inflow):
+                add_to_inventory(c, slots * inflow[c], inventory, pending_reqs, required_qty, unblock_indptr, unblock_idx)
+            current_day = (slot_time[n_slots + slots - 1] // workday_minutes) + 1
+            n_slots += slots
+        else:
+            # A task runs out this slot; play it out worker by worker
+            slots = 1
+            slot_time[n_slots] = current_time_minutes
+            for w in range(n_workers):
+                task = worker_assignments[w]
                 time_remaining = slot_duration_seconds
-                dominant_task = task["task_id"]
+                dominant_task = task
                 pieces_total = 0
 
-                while time_remaining > 0 and task:
-                    if task["remaining_qty"] <= 0:
-                        available_tasks = [t for t in available_tasks if t["remaining_qty"] > 0]
-                        if not available_tasks:
+                while time_remaining > 0:
+                    if remaining_qty[task] <= 0:
+                        # Switch to whichever available task has the most pieces left
+                        next_task = -1
+                        for t in available_idx:
+                            if remaining_qty[t] > 0 and (next_task < 0 or remaining_qty[t] > remaining_qty[next_task]):
+                                next_task = t
+                        if next_task < 0:
                             break
-                        task = max(available_tasks, key=lambda t: t["remaining_qty"])
+                        task = next_task
                         continue
 
-                    tpp = task["time_per_piece"]
-                    max_pieces = min(task["remaining_qty"], time_remaining // tpp)
+                    tpp = time_per_piece[task]
+                    max_pieces = min(remaining_qty[task], time_remaining // tpp)
                     if max_pieces > 0:
-                        task["remaining_qty"] -= max_pieces
-                        inventory[task["task_id"]] += max_pieces
+                        remaining_qty[task] -= max_pieces
+                        add_to_inventory(
+                            task_cell[task], max_pieces, inventory, pending_reqs, required_qty,
+                            unblock_indptr, unblock_idx,
+                        )
                         pieces_total += max_pieces
-                        time_spent = max_pieces * tpp
-                        time_remaining -= time_spent
+                        time_remaining -= max_pieces * tpp
 
-                        simulation_log.append({
-                            "time": format_time(current_time_minutes),
-                            "event": f"Worker {worker_name} produced {max_pieces} pcs of {task['task_id']} ({task['description']})"
-                        })
+                        log_time[n_log] = current_time_minutes
+                        log_worker[n_log] = w
+                        log_task[n_log] = task
+                        log_pieces[n_log] = max_pieces
+                        n_log += 1
                     else:
                         break
 
-                schedule[current_day][worker_name][current_slot] = f"[{dominant_task}] {task['description']} ({pieces_total} pcs)"
+                cell_dominant[n_slots, w] = dominant_task
+                cell_task[n_slots, w] = task
+                cell_pieces[n_slots, w] = pieces_total
+            n_slots += 1
+
+        current_time_minutes += slots * slot_duration_minutes
+        if current_time_minutes > max_minutes:
+            break
+
+    log = (log_time[:n_log], log_worker[:n_log], log_task[:n_log], log_pieces[:n_log])
+    cells = (slot_time[:n_slots], cell_dominant[:n_slots], cell_task[:n_slots], cell_pieces[:n_slots])
+    return inventory, log, cells, current_day
+
+def hash_dataframe(df):
+    # hash_pandas_object only covers row values, but the simulation reads fields by column name
+    header = repr((tuple(df.columns), str(df.dtypes.tolist()))).encode()
+    return header + pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+DATAFRAME_HASH_FUNCS = {pd.DataFrame: hash_dataframe}
+
+@st.cache_data(hash_funcs=DATAFRAME_HASH_FUNCS)
+def _parse_products(products_df):
+    # Adds a _requirements column holding each task's prerequisite ids as a list
+    requirements = products_df["Requirements"].fillna("").astype(str)
+    requirements = requirements.where(requirements.str.lower() != "nan", "")
+    return products_df.assign(
+        _requirements=requirements.str.split(",").apply(lambda reqs: [r.strip() for r in reqs if r.strip()])
+    )
+
+@st.cache_data(hash_funcs=DATAFRAME_HASH_FUNCS)
+def _build_sim_context(products_df, workers_df):
+    products_df = _parse_products(products_df)
+    task_columns = column_positions(products_df)
+    worker_columns = column_positions(workers_df)
+    task_sim_data_map = {}
+    for row in products_df.itertuples(index=False, name=None):
+        task = TaskSimulationData(row, *task_columns)
+        task_sim_data_map[task.task_id] = task
+    worker_sim_data_map = {}
+    for row in workers_df.itertuples(index=False, name=None):
+        worker = WorkerSimulationData(row, *worker_columns)
+        worker_sim_data_map[worker.name] = worker
+    tasks = list(task_sim_data_map.values())
+    workers = list(worker_sim_data_map.values())
+
+    # Both sides as int16 percentages
+    worker_skill_matrix = to_percentages(
+        np.array([w.skills for w in workers], dtype=np.float64).reshape(len(workers), len(SKILL_COLUMNS)) * 100
+    )
+    task_skill_matrix = to_percentages(
+        np.array([t.skill_requirements for t in tasks], dtype=np.float64).reshape(len(tasks), len(SKILL_COLUMNS))
+    )
+
+    # Inventory cells: task ids first (so a task's cell is also its row in the matrices),
+    # then any prerequisite that isn't a known task
+    cell_index = {task_id: i for i, task_id in enumerate(task_sim_data_map)}
+    max_reqs = max((len(t.requirements) for t in tasks), default=0)
+    requirement_index = np.full((len(tasks), max_reqs), -1, np.int64)
+    for i, t in enumerate(tasks):
+        requirement_index[i, :len(t.requirements)] = [cell_index.setdefault(req, len(cell_index)) for req in t.requirements]
+
+    return SimContext(
+        task_sim_data_map=task_sim_data_map,
+        worker_sim_data_map=worker_sim_data_map,
+        skill_score_matrix=calculate_skill_match(worker_skill_matrix, task_skill_matrix),
+        requirement_index=requirement_index,
+        cell_index=cell_index,
+        product_tasks={
+            product: group["Result"].tolist()
+            for product, group in products_df.sort_values(by="Result").groupby("Product", sort=False)
+        },
+    )
 
-            current_time_minutes += slot_duration_minutes
-            if current_time_minutes > estimated_days * workday_minutes * 2:
-                break
+def assign_tasks(products_to_produce, available_workers_df, products_df, slot_duration_minutes=30):
+    try:
+        workday_minutes = 8 * 60
+        ctx = _build_sim_context(products_df, available_workers_df)
+        workers = list(ctx.worker_sim_data_map.values())
+        tasks = list(ctx.task_sim_data_map.values())
+
+        # Expand tasks
+        order = TaskArrays.from_order(products_to_produce, ctx)
+        task_rows = order.task_rows
+
+        total_seconds = int((order.time_per_piece.astype(np.int64) * order.remaining_qty).sum())
+        total_worker_seconds_per_day = len(available_workers_df) * workday_minutes * 60
+        estimated_days = max(1, math.ceil(total_seconds / total_worker_seconds_per_day))
+
+        max_minutes = estimated_days * workday_minutes * 2
+        req_matrix = ctx.requirement_index[task_rows]
+        inventory, log, cells, current_day = _simulate(
+            order.remaining_qty,
+            order.time_per_piece,
+            task_rows,
+            ctx.skill_score_matrix[:, task_rows],
+            req_matrix,
+            *build_unblock_index(req_matrix, len(ctx.cell_index)),
+            len(ctx.cell_index),
+            slot_duration_minutes,
+            workday_minutes,
+            max_minutes,
+        )
+
+        # cells holds each processed slot's start time and (slots, workers) arrays of the
+        # dominant task, last task and pieces made
+        slot_time, cell_dominant, cell_task, cell_pieces = (c.tolist() for c in cells)
+        schedule = [
+            (minutes // workday_minutes + 1, worker.name, (minutes % workday_minutes) // slot_duration_minutes,
+             f"[{tasks[task_rows[dominant]].task_id}] {tasks[task_rows[t]].description} ({pieces_total} pcs)")
+            for minutes, dominants, last_tasks, pieces in zip(slot_time, cell_dominant, cell_task, cell_pieces)
+            for worker, dominant, t, pieces_total in zip(workers, dominants, last_tasks, pieces)
+        ]
+        # Kept as columns of indices; the strings are only built when the log is shown
+        simulation_log = {
+            "time_slot": log[0] // slot_duration_minutes,
+            "worker": log[1],
+            "task": log[2],
+            "pieces": log[3],
+            "worker_names": [w.name for w in workers],
+            "task_ids": [tasks[r].task_id for r in task_rows],
+            "descriptions": [tasks[r].description for r in task_rows],
+        }
 
         return {
             "schedule": schedule,
-            "inventory": dict(inventory),
+            "inventory": {task_id: int(inventory[c]) for task_id, c in ctx.cell_index.items()},
             "simulation_log": simulation_log,
             "estimated_days": current_day,
+            "time_labels": build_time_labels(max_minutes, slot_duration_minutes),
         }
 
     except Exception as e:
@@ -219,29 +497,34 @@ def assign_tasks(products_to_produce, available_workers_df, products_df, slot_du
 # -----------------------------
 # Display Functions
 # -----------------------------
-def display_schedule_gantt(schedule_data, estimated_days):
+def simulation_log_frame(log, time_labels):
+    return pd.DataFrame({
+        "time": [time_labels[slot] for slot in log["time_slot"].tolist()],
+        "event": [
+            f"Worker {log['worker_names'][w]} produced {pieces} pcs of {log['task_ids'][t]} ({log['descriptions'][t]})"
+            for w, t, pieces in zip(log["worker"].tolist(), log["task"].tolist(), log["pieces"].tolist())
+        ],
+    })
+
+def display_schedule_gantt(schedule_data, estimated_days, time_labels):
     st.subheader("Schedule")
     if estimated_days > 0:
+        # schedule_data is a flat list of (day, worker, slot, cell); pivot it once for all tabs
+        schedule_df = pd.DataFrame.from_records(schedule_data, columns=["day", "worker", "slot", "cell"])
+        schedule_days = set(schedule_df["day"])
+        if schedule_days:
+            schedule_df = schedule_df.pivot_table(
+                index=["day", "slot"], columns="worker", values="cell", aggfunc="first"
+            ).rename_axis(columns=None)
         day_tabs = st.tabs([f"Day {d}" for d in range(1, estimated_days + 1)])
         for idx, day in enumerate(range(1, estimated_days + 1)):
             with day_tabs[idx]:
-                if day in schedule_data:
-                    day_schedule = schedule_data[day]
-                    all_slots = set()
-                    for ws in day_schedule.values():
-                        all_slots.update(ws.keys())
-                    if all_slots:
-                        max_slot = max(all_slots)
-                        rows = []
-                        for slot in range(max_slot + 1):
-                            row = {"TIME": format_time(slot * 30)}
-                            for worker in sorted(day_schedule.keys()):
-                                row[worker] = day_schedule[worker].get(slot, "idle")
-                            rows.append(row)
-                        df = pd.DataFrame(rows)
-                        st.dataframe(df, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("No schedule for this day.")
+                if day in schedule_days:
+                    # Only the workers scheduled that day, with every slot up to the last one
+                    df = schedule_df.loc[day].dropna(axis=1, how="all")
+                    df = df.reindex(range(df.index.max() + 1)).fillna("idle")
+                    df.insert(0, "TIME", [time_labels[slot] for slot in df.index])
+                    st.dataframe(df, use_container_width=True, hide_index=True)
                 else:
                     st.info("No schedule for this day.")
     else:
@@ -254,9 +537,11 @@ def display_simulation_results(result):
     st.success(f"Simulation completed! Estimated {result['estimated_days']} day(s).")
     tab1, tab2 = st.tabs(["📅 Schedule", "📝 Simulation Log"])
     with tab1:
-        display_schedule_gantt(result["schedule"], result["estimated_days"])
+        display_schedule_gantt(result["schedule"], result["estimated_days"], result["time_labels"])
     with tab2:
-        st.dataframe(pd.DataFrame(result["simulation_log"]), use_container_width=True, hide_index=True)
+        st.dataframe(
+            simulation_log_frame(result["simulation_log"], result["time_labels"]), use_container_width=True, hide_index=True
+        )
 
 # -----------------------------
 # Main App
@@ -276,13 +561,18 @@ def main():
         st.dataframe(workers_df, use_container_width=True)
     elif page == "Production Order":
         st.header("🎯 Production Order")
-        products_to_produce = {}
-        for product in products_df["Product"].unique():
-            qty = st.number_input(f"{product}", min_value=0, max_value=1000, value=0, step=1)
-            if qty > 0:
-                products_to_produce[product] = qty
-        selected_workers = st.multiselect("Choose Workers", workers_df["Worker"].tolist(), default=workers_df["Worker"].tolist())
-        if products_to_produce and st.button("🚀 Run Simulation"):
+        # Inputs only take effect on submit, so editing quantities doesn't rerun the page
+        with st.form("order_form"):
+            products_to_produce = {}
+            for product in products_df["Product"].unique():
+                qty = st.number_input(f"{product}", min_value=0, max_value=1000, value=0, step=1)
+                if qty > 0:
+                    products_to_produce[product] = qty
+            selected_workers = st.multiselect("Choose Workers", workers_df["Worker"].tolist(), default=workers_df["Worker"].tolist())
+            submitted = st.form_submit_button("🚀 Run Simulation")
+        if submitted and not products_to_produce:
+            st.warning("Enter a quantity for at least one product.")
+        elif submitted:
             available_workers_df = workers_df[workers_df["Worker"].isin(selected_workers)]
             result = assign_tasks(products_to_produce, available_workers_df, products_df)
             if result: